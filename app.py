@@ -2,7 +2,7 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 import os
 from llm import analyze_repo
 from github import Github
@@ -65,7 +65,7 @@ def generate_jwt():
 async def update_readme(installation_id: int, repo_full_name: str) -> dict:
     """Update README.md and create/update PR"""
     try:
-        current_time = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        current_time = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
         user_login = "taradepan"
         repo_url = f"https://github.com/{repo_full_name}"
 
@@ -253,7 +253,7 @@ async def root():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        "timestamp": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
     }
 
 if __name__ == "__main__":
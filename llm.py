@@ -1,167 +1,78 @@
 import os
-from groq import Groq
+from groq import AsyncGroq
 import logging
-from datetime import datetime
-import requests
-from base64 import b64decode
+from datetime import datetime, timezone
+import asyncio
+import httpx
+import ast
 import json
 import re
+import hashlib
+import io
+import random
+import sqlite3
+import time
+import weakref
+from contextlib import closing
+from functools import lru_cache
+from typing import AsyncIterator, Iterator, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def extract_current_info(log_text: str) -> tuple:
-    
-    date_pattern = r'Current Date and Time \(UTC - YYYY-MM-DD HH:MM:SS formatted\): (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})'
-    date_match = re.search(date_pattern, log_text)
-    if date_match:
-        formatted_date = date_match.group(1)
-    else:
-        formatted_date = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+# One semaphore per event loop, shared by every analysis running on it
+_BATCH_SEMAPHORES = weakref.WeakKeyDictionary()
 
-    login_pattern = r"Current User's Login: (\w+)"
-    login_match = re.search(login_pattern, log_text)
-    user_login = login_match.group(1) if login_match else "unknown"
+GITHUB_API_BASE = "https://api.github.com"
+GITHUB_GRAPHQL_URL = f"{GITHUB_API_BASE}/graphql"
+GRAPHQL_BATCH_SIZE = 100
+MAX_CONCURRENT_BATCHES = 16
+MAX_BLOB_BYTES = 1_000_000
+MAX_FILE_CHARS = 1000
+SUMMARY_FALLBACK_CHARS = 300
+SUMMARIZE = os.getenv("SUMMARIZE", "false").lower() == "true"
+HTTP_LIMITS = httpx.Limits(max_connections=32)
+HTTP_TIMEOUT = httpx.Timeout(30.0)
+MAX_RETRIES = 5
+RETRY_BACKOFF_FACTOR = 0.3
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RATE_LIMIT_WAIT = 60
 
-    return formatted_date, user_login
+CACHE_DIR = os.getenv("README_BOT_CACHE_DIR", ".readme_cache")
+HTTP_CACHE_MAX_AGE = 24 * 60 * 60
+LLM_CACHE_TTL = 7 * 24 * 60 * 60
 
-def clean_output(generated_content: str) -> str:
-    cleaned = re.sub(r'<think>.*?</think>', '', generated_content, flags=re.DOTALL)
-    cleaned = re.sub(r'\n{3,}', '\n\n', cleaned)
-    cleaned = cleaned.strip()
-    
-    return cleaned
+MODEL = "llama-3.3-70b-versatile"
+PROMPT_VERSION = "4"
 
-def get_repo_data(repo_url: str) -> tuple:
-    """
-    Get repository data using GitHub API
-    """
-    try:
-        _, _, _, owner, repo = repo_url.rstrip('/').split('/')
-        api_base = "https://api.github.com"
-        headers = {
-            "Accept": "application/vnd.github.v3+json",
-            "Authorization": f"Bearer {os.getenv('GITHUB_TOKEN')}"
-        }
-        
-        logger.info(f"Fetching repository data for {owner}/{repo}")
-        
-        repo_response = requests.get(
-            f"{api_base}/repos/{owner}/{repo}",
-            headers=headers
-        )
-        
-        if repo_response.status_code != 200:
-            logger.error(f"Failed to fetch repo data: {repo_response.text}")
-            raise Exception(f"GitHub API returned {repo_response.status_code}: {repo_response.text}")
-            
-        repo_data = repo_response.json()
-        logger.info(f"Successfully fetched repository info for {owner}/{repo}")
-        
-        summary = f"""
-            Repository Information:
-            - Name: {repo_data.get('name')}
-            - Description: {repo_data.get('description', 'No description provided')}
-            - Primary Language: {repo_data.get('language', 'Not specified')}
-            - Topics: {', '.join(repo_data.get('topics', ['None specified']))}
-            - Stars: {repo_data.get('stargazers_count', 0)}
-            - Forks: {repo_data.get('forks_count', 0)}
-            - Created: {repo_data.get('created_at', 'Unknown')}
-            - Last Updated: {repo_data.get('updated_at', 'Unknown')}
-            """
-
-        default_branch = repo_data.get('default_branch', 'main')
-        logger.info(f"Default branch is {default_branch}")
-
-        tree_response = requests.get(
-            f"{api_base}/repos/{owner}/{repo}/git/trees/{default_branch}?recursive=1",
-            headers=headers
-        )
-        
-        if tree_response.status_code != 200:
-            logger.error(f"Failed to fetch tree data: {tree_response.text}")
-            raise Exception(f"GitHub API returned {tree_response.status_code}: {tree_response.text}")
-            
-        tree_data = tree_response.json()
-        logger.info(f"Successfully fetched repository tree")
-
-        tree = "File Structure:\n"
-        content = "Code Analysis:\n"
-        
-        binary_extensions = {
-            '.png', '.jpg', '.jpeg', '.gif', '.ico', '.pdf', '.zip', '.tar', '.gz',
-            '.rar', '.7z', '.exe', '.dll', '.so', '.dylib', '.class', '.pyc',
-            '.pyo', '.pyd', '.db', '.sqlite', '.sqlite3', '.bin', '.dat', '.iso'
-        }
-        
-        excluded_paths = {
-            '.git/', '.github/workflows/', 'node_modules/', 'venv/', 'env/',
-            '__pycache__/', 'dist/', 'build/', 'coverage/', '.pytest_cache/'
-        }
-        
-        for item in tree_data.get('tree', []):
-            path = item.get('path', '')
-            if not path:
-                continue
-                
-            tree += f"- {path}\n"
-            
-            if (item.get('type') == 'blob' and
-                not any(path.endswith(ext) for ext in binary_extensions) and
-                not any(excl in path for excl in excluded_paths)):
-                try:
-                    file_response = requests.get(
-                        f"{api_base}/repos/{owner}/{repo}/contents/{path}",
-                        headers=headers
-                    )
-                    
-                    if file_response.status_code == 200:
-                        file_data = file_response.json()
-                        if file_data.get('content'):
-                            try:
-                                file_content = b64decode(file_data['content']).decode('utf-8')
-                                if file_content.strip():  # Skip empty files
-                                    content += f"\n### {path}\n```\n{file_content[:1000]}...\n```\n"
-                                    logger.info(f"Processed file: {path}")
-                            except UnicodeDecodeError:
-                                logger.info(f"Skipping binary file: {path}")
-                                continue
-                except Exception as e:
-                    logger.error(f"Error fetching content for {path}: {str(e)}")
-                    continue
-
-        logger.info(f"Successfully processed {len(tree_data.get('tree', []))} files")
-        return summary, tree, content
-
-    except Exception as e:
-        logger.error(f"Error in get_repo_data: {str(e)}")
-        raise Exception(f"Failed to analyze repository: {str(e)}")
-
-def analyze_repo_sync(repo_url: str, context: dict = None) -> str:
-    try:
-        logger.info(f"Starting analysis for {repo_url}")
-        
-        summary, tree, content = get_repo_data(repo_url)
-        
-        log_text = f"Current Date and Time (UTC - YYYY-MM-DD HH:MM:SS formatted): 2025-02-02 10:45:04\nCurrent User's Login: taradepan"
-        current_date, user_login = extract_current_info(log_text)
-        
-        client = Groq(
-            api_key=os.environ.get("GROQ_API_KEY"),
-        )
-
-        analysis_prompt = f"""Imagine you are a Senior Developer, expert in writing Readme.md. Analyze this GitHub repository and create a comprehensive README.
+_BINARY_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.ico', '.pdf', '.zip', '.tar', '.gz',
+    '.rar', '.7z', '.exe', '.dll', '.so', '.dylib', '.class', '.pyc',
+    '.pyo', '.pyd', '.db', '.sqlite', '.sqlite3', '.bin', '.dat', '.iso'
+)
 
-Repository URL: {repo_url}
+_JS_EXTENSIONS = ('.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx')
 
-Repository Overview:
-{summary}
+# Directory names skipped wherever they appear in a path
+_EXCLUDED_DIRS = frozenset({
+    '.git', 'node_modules', 'venv', 'env', '__pycache__', 'dist', 'build',
+    'coverage', '.pytest_cache'
+})
+# Multi-segment directories, matched from the repository root
+_EXCLUDED_PREFIXES = ('.github/workflows/',)
 
-File Structure:
-{tree}
+_DATE_RE = re.compile(r'Current Date and Time \(UTC - YYYY-MM-DD HH:MM:SS formatted\): (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+_LOGIN_RE = re.compile(r"Current User's Login: (\w+)")
+_THINK_RE = re.compile(r'<think>.*?</think>', re.DOTALL)
+# <think> blocks (with the newlines around them) or runs of blank lines, cleaned in one pass
+_CLEAN_RE = re.compile(r'(?:\n*<think>.*?</think>)+\n*|\n{3,}', re.DOTALL)
+_JS_DECL_RE = re.compile(
+    r'^(?:import[ \t].+|(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:function\*?|class|const|let|var)\s+\w+)',
+    re.MULTILINE
+)
 
-Code Analysis:
-{content}
+# Kept byte-identical across requests and sent first so Groq can reuse the cached prompt prefix.
+STATIC_PREAMBLE = """Imagine you are a Senior Developer, expert in writing Readme.md. Analyze the GitHub repository described in the user message and create a comprehensive README.
 
 Generate a detailed README in markdown format that includes:
 1. Project Title and Description
@@ -187,17 +98,462 @@ Important Notes:
 - Your output will be directly used as the README.md file so make sure it's perfect!
 Remember: ONLY GENERATE THE FINAL README FILE IN MARKDOWN FORMAT"""
 
-        chat_completion = client.chat.completions.create(
-            messages=[{
+def extract_current_info(log_text: Optional[str] = None, *, now: Optional[datetime] = None, user: Optional[str] = None) -> tuple:
+    if log_text is None:
+        return (now or datetime.now(timezone.utc)).strftime('%Y-%m-%d %H:%M:%S'), user or "unknown"
+
+    date_match = _DATE_RE.search(log_text)
+    if date_match:
+        formatted_date = date_match.group(1)
+    else:
+        formatted_date = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+    login_match = _LOGIN_RE.search(log_text)
+    user_login = login_match.group(1) if login_match else "unknown"
+
+    return formatted_date, user_login
+
+def _clean_sub(match: re.Match) -> str:
+    text = match.group(0)
+    if '<think>' in text:
+        # Keep the surrounding newlines, collapsed the same way as any other blank run
+        text = _THINK_RE.sub('', text)
+        return text if len(text) < 3 else '\n\n'
+    return '\n\n'
+
+def clean_output(generated_content: str) -> str:
+    return _CLEAN_RE.sub(_clean_sub, generated_content).strip()
+
+def _is_excluded(path: str) -> bool:
+    return _is_excluded_dir(path.rpartition('/')[0])
+
+@lru_cache(maxsize=4096)
+def _is_excluded_dir(directory: str) -> bool:
+    # Tree entries share directories, so each one is only inspected once
+    if not directory:
+        return False
+    if f"{directory}/".startswith(_EXCLUDED_PREFIXES):
+        return True
+    return not _EXCLUDED_DIRS.isdisjoint(directory.split('/'))
+
+def _summarize_file(path: str, text: str) -> str:
+    """
+    Compact digest of a source file: docstring, imports and top-level declarations
+    """
+    if path.endswith('.py'):
+        try:
+            module = ast.parse(text)
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            # Deeply nested or huge generated expressions can exhaust the parser
+            return text[:SUMMARY_FALLBACK_CHARS]
+
+        lines = []
+        docstring = ast.get_docstring(module)
+        if docstring:
+            lines.append(f'"""{docstring.strip().splitlines()[0]}"""')
+        for node in module.body:
+            if isinstance(node, ast.Import):
+                lines.append(f"import {', '.join(alias.name for alias in node.names)}")
+            elif isinstance(node, ast.ImportFrom):
+                lines.append(f"from {'.' * node.level}{node.module or ''} import {', '.join(alias.name for alias in node.names)}")
+            elif isinstance(node, ast.AsyncFunctionDef):
+                lines.append(f"async def {node.name}")
+            elif isinstance(node, ast.FunctionDef):
+                lines.append(f"def {node.name}")
+            elif isinstance(node, ast.ClassDef):
+                lines.append(f"class {node.name}")
+        return "\n".join(lines) or text[:SUMMARY_FALLBACK_CHARS]
+
+    if path.endswith(_JS_EXTENSIONS):
+        lines = [match.group(0).strip() for match in _JS_DECL_RE.finditer(text)]
+        if lines:
+            return "\n".join(lines)
+
+    return text[:SUMMARY_FALLBACK_CHARS]
+
+def _file_section(path: str, text: str) -> str:
+    if SUMMARIZE:
+        return f"\n### {path}\n{_summarize_file(path, text)}\n"
+    return f"\n### {path}\n```\n{text[:MAX_FILE_CHARS]}...\n```\n"
+
+def _file_sections(texts: dict) -> dict:
+    return {path: _file_section(path, text) for path, text in texts.items()}
+
+def _log_prompt_usage(usage) -> None:
+    if usage is None:
+        return
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached_tokens = getattr(details, 'cached_tokens', None) if details else None
+    logger.info(f"Prompt tokens: {usage.prompt_tokens}, cached prompt tokens: {cached_tokens if cached_tokens is not None else 'n/a'}")
+
+def _github_headers() -> dict:
+    return {
+        "Accept": "application/vnd.github.v3+json",
+        "Authorization": f"Bearer {os.getenv('GITHUB_TOKEN')}"
+    }
+
+def _retry_delay(response: Optional[httpx.Response], attempt: int) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        # Primary rate limit: the window reopens at X-RateLimit-Reset
+        reset = response.headers.get("X-RateLimit-Reset")
+        if response.headers.get("X-RateLimit-Remaining") == "0" and reset and reset.isdigit():
+            return max(int(reset) - time.time(), 0) + 1
+    return RETRY_BACKOFF_FACTOR * (2 ** attempt) * (0.5 + random.random())
+
+def _is_rate_limited(response: httpx.Response) -> bool:
+    return (response.status_code in (403, 429) and
+            ("Retry-After" in response.headers or response.headers.get("X-RateLimit-Remaining") == "0"))
+
+async def _request_with_retry(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Send a GitHub request, retrying transport errors, 5xx responses and rate
+    limits with exponential backoff. A rate limit that won't reset within
+    MAX_RATE_LIMIT_WAIT fails immediately instead of sleeping.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = _retry_delay(None, attempt)
+            logger.warning(f"{method} {url} failed ({str(e)}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+
+        rate_limited = _is_rate_limited(response)
+        if not (rate_limited or response.status_code in RETRY_STATUSES) or attempt == MAX_RETRIES:
+            return response
+
+        delay = _retry_delay(response, attempt)
+        if rate_limited and delay > MAX_RATE_LIMIT_WAIT:
+            raise Exception(f"GitHub rate limit exceeded for {method} {url}, resets in {delay:.0f}s")
+
+        logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+@lru_cache(maxsize=1)
+def _cache_path() -> str:
+    # Create the directory and schema once per process rather than on every lookup
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, "cache.sqlite3")
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS http_cache "
+            "(url TEXT PRIMARY KEY, etag TEXT NOT NULL, body TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache "
+            "(key TEXT PRIMARY KEY, content TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+    return path
+
+def _open_cache() -> sqlite3.Connection:
+    return sqlite3.connect(_cache_path(), timeout=5)
+
+async def _cache_call(func, *args):
+    """
+    Run a blocking cache operation off the event loop; cache failures are logged
+    and treated as a miss so the request still goes out uncached
+    """
+    try:
+        return await asyncio.to_thread(func, *args)
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"Cache unavailable, continuing without it: {str(e)}")
+        return None
+
+def _llm_cache_key(repo_url: str, tree_sha: str) -> str:
+    return hashlib.sha256(f"{MODEL}|{PROMPT_VERSION}|{SUMMARIZE}|{repo_url}|{tree_sha}".encode()).hexdigest()
+
+def _llm_cache_get(key: str):
+    with closing(_open_cache()) as cache:
+        row = cache.execute(
+            "SELECT content FROM llm_cache WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+    return row[0] if row else None
+
+def _llm_cache_set(key: str, content: str, ttl: int = LLM_CACHE_TTL):
+    with closing(_open_cache()) as cache, cache:
+        cache.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, content, expires_at) VALUES (?, ?, ?)",
+            (key, content, time.time() + ttl)
+        )
+
+def _http_cache_get(url: str):
+    with closing(_open_cache()) as cache:
+        return cache.execute("SELECT etag, body, fetched_at FROM http_cache WHERE url = ?", (url,)).fetchone()
+
+def _http_cache_set(url: str, etag: str, body: str):
+    with closing(_open_cache()) as cache, cache:
+        cache.execute(
+            "INSERT OR REPLACE INTO http_cache (url, etag, body, fetched_at) VALUES (?, ?, ?, ?)",
+            (url, etag, body, time.time())
+        )
+
+async def _cached_get(client: httpx.AsyncClient, url: str) -> dict:
+    """
+    GET a GitHub REST URL, revalidating a stored copy with If-None-Match.
+    304 responses are served from the cache and don't count against the rate limit.
+    """
+    row = await _cache_call(_http_cache_get, url)
+
+    headers = {}
+    if row and time.time() - row[2] < HTTP_CACHE_MAX_AGE:
+        headers["If-None-Match"] = row[0]
+
+    response = await _request_with_retry(client, "GET", url, headers=headers)
+
+    if response.status_code == 304:
+        logger.info(f"Not modified, using cached response for {url}")
+        return json.loads(row[1])
+
+    if response.status_code != 200:
+        logger.error(f"Failed to fetch {url}: {response.text}")
+        raise Exception(f"GitHub API returned {response.status_code}: {response.text}")
+
+    etag = response.headers.get("ETag")
+    if etag:
+        await _cache_call(_http_cache_set, url, etag, response.text)
+
+    return response.json()
+
+async def _fetch_blob_batch(client: httpx.AsyncClient, owner: str, repo: str, batch: list) -> dict:
+    """
+    Fetch the text of up to GRAPHQL_BATCH_SIZE (path, sha) blobs in a single GraphQL request
+    """
+    fields = "\n".join(
+        f"f{i}: object(oid: {json.dumps(sha)}) {{ ... on Blob {{ text isBinary }} }}"
+        for i, (_, sha) in enumerate(batch)
+    )
+    query = f"query($owner: String!, $name: String!) {{ repository(owner: $owner, name: $name) {{ {fields} }} }}"
+
+    response = await _request_with_retry(
+        client,
+        "POST",
+        GITHUB_GRAPHQL_URL,
+        json={"query": query, "variables": {"owner": owner, "name": repo}}
+    )
+
+    if response.status_code != 200:
+        logger.error(f"Failed to fetch blob contents: {response.text}")
+        return {}
+
+    payload = response.json()
+    if payload.get('errors'):
+        logger.error(f"GraphQL errors while fetching blob contents: {payload['errors']}")
+
+    texts = {}
+    repository = (payload.get('data') or {}).get('repository') or {}
+    for i, (path, _) in enumerate(batch):
+        blob = repository.get(f"f{i}")
+        if not blob:
+            continue
+        if blob.get('isBinary'):
+            logger.info(f"Skipping binary file: {path}")
+            continue
+        if blob.get('text') and blob['text'].strip():  # Skip empty files
+            texts[path] = blob['text']
+    del payload, repository
+
+    # ast.parse on large files would otherwise block the event loop shared with the webhook handlers
+    return await asyncio.to_thread(_file_sections, texts)
+
+def _batch_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _BATCH_SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = _BATCH_SEMAPHORES[loop] = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+    return semaphore
+
+async def _fetch_blob_batch_bounded(client: httpx.AsyncClient, owner: str, repo: str, batch: list) -> dict:
+    async with _batch_semaphore():
+        return await _fetch_blob_batch(client, owner, repo, batch)
+
+async def _fetch_blobs_graphql(client: httpx.AsyncClient, owner: str, repo: str, files: list) -> dict:
+    """
+    Fetch the text of many (path, sha) blobs, running at most
+    MAX_CONCURRENT_BATCHES GraphQL batches at a time
+    """
+    tasks = [
+        _fetch_blob_batch_bounded(client, owner, repo, files[start:start + GRAPHQL_BATCH_SIZE])
+        for start in range(0, len(files), GRAPHQL_BATCH_SIZE)
+    ]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    blobs = {}
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"Error fetching blob batch: {str(result)}")
+            continue
+        blobs.update(result)
+
+    return blobs
+
+async def get_repo_data_async(repo_url: str) -> tuple:
+    """
+    Get repository data using GitHub API
+    """
+    try:
+        _, _, _, owner, repo = repo_url.rstrip('/').split('/')
+        api_base = GITHUB_API_BASE
+
+        async with httpx.AsyncClient(
+            http2=True,
+            headers=_github_headers(),
+            limits=HTTP_LIMITS,
+            timeout=HTTP_TIMEOUT
+        ) as client:
+            logger.info(f"Fetching repository data for {owner}/{repo}")
+
+            repo_data = await _cached_get(client, f"{api_base}/repos/{owner}/{repo}")
+            logger.info(f"Successfully fetched repository info for {owner}/{repo}")
+            
+            summary = "\n".join([
+                "Repository Information:",
+                f"- Name: {repo_data.get('name')}",
+                f"- Description: {repo_data.get('description', 'No description provided')}",
+                f"- Primary Language: {repo_data.get('language', 'Not specified')}",
+                f"- Topics: {', '.join(repo_data.get('topics', ['None specified']))}",
+                f"- Stars: {repo_data.get('stargazers_count', 0)}",
+                f"- Forks: {repo_data.get('forks_count', 0)}",
+                f"- Created: {repo_data.get('created_at', 'Unknown')}",
+                f"- Last Updated: {repo_data.get('updated_at', 'Unknown')}",
+            ])
+
+            default_branch = repo_data.get('default_branch', 'main')
+            logger.info(f"Default branch is {default_branch}")
+
+            tree_data = await _cached_get(
+                client,
+                f"{api_base}/repos/{owner}/{repo}/git/trees/{default_branch}?recursive=1"
+            )
+            logger.info(f"Successfully fetched repository tree")
+
+            # The tree SHA pins the content, so a cached README makes the blob fetch unnecessary
+            tree_sha = tree_data.get('sha')
+            cache_key = _llm_cache_key(repo_url, tree_sha) if tree_sha else None
+            if cache_key:
+                cached_content = await _cache_call(_llm_cache_get, cache_key)
+                if cached_content is not None:
+                    logger.info(f"Using cached README for {repo_url} at tree {tree_sha}")
+                    return summary, None, [], cache_key, cached_content
+
+            tree_parts = []
+            
+            if tree_data.get('truncated'):
+                logger.warning(f"Tree for {owner}/{repo} was truncated by the GitHub API")
+
+            files = []
+            for item in tree_data.get('tree', []):
+                path = item.get('path', '')
+                if not path:
+                    continue
+                    
+                tree_parts.append(f"- {path}\n")
+                
+                if (item.get('type') == 'blob' and
+                    item.get('size', 0) <= MAX_BLOB_BYTES and
+                    not path.lower().endswith(_BINARY_EXTENSIONS) and
+                    not _is_excluded(path)):
+                    files.append((path, item.get('sha')))
+
+            tree = "".join(tree_parts)
+
+            file_contents = await _fetch_blobs_graphql(client, owner, repo, files)
+
+        file_sections = []
+        for path, _ in files:
+            if path in file_contents:
+                file_sections.append(file_contents[path])
+                logger.info(f"Processed file: {path}")
+
+        logger.info(f"Successfully processed {len(tree_data.get('tree', []))} files")
+        return summary, tree, file_sections, cache_key, None
+
+    except Exception as e:
+        logger.error(f"Error in get_repo_data_async: {str(e)}")
+        raise Exception(f"Failed to analyze repository: {str(e)}")
+
+def _iter_prompt_parts(repo_url: str, summary: str, tree: str, file_sections: list) -> Iterator[str]:
+    """
+    Yield the repository-specific user prompt piece by piece, without joining it up front
+    """
+    yield f"Repository URL: {repo_url}\n\nRepository Overview:\n"
+    yield summary
+    yield "\n\nFile Structure:\n"
+    yield tree
+    yield "\n\nCode Analysis:\n"
+    yield from file_sections
+
+async def analyze_repo_stream(repo_url: str, context: dict = None) -> AsyncIterator[str]:
+    """
+    Yield the generated README as the model produces it, without the footer
+    """
+    logger.info(f"Starting analysis for {repo_url}")
+    
+    summary, tree, file_sections, cache_key, cached_content = await get_repo_data_async(repo_url)
+    if cached_content is not None:
+        yield cached_content
+        return
+    
+    client = AsyncGroq(
+        api_key=os.environ.get("GROQ_API_KEY"),
+    )
+
+    buf = io.StringIO()
+    for part in _iter_prompt_parts(repo_url, summary, tree, file_sections):
+        buf.write(part)
+    analysis_prompt = buf.getvalue()
+    del buf, summary, tree, file_sections
+
+    stream = await client.chat.completions.create(
+        messages=[
+            {
+                "role": "system",
+                "content": STATIC_PREAMBLE
+            },
+            {
                 "role": "user",
                 "content": analysis_prompt
-            }],
-            model="llama-3.3-70b-versatile",
-            temperature=0.2,
-            max_tokens=4000
-        )
+            }
+        ],
+        model=MODEL,
+        temperature=0.2,
+        max_tokens=4000,
+        stream=True
+    )
 
-        generated_content = chat_completion.choices[0].message.content
+    parts = []
+    async for chunk in stream:
+        x_groq = getattr(chunk, 'x_groq', None)
+        if x_groq is not None:
+            _log_prompt_usage(getattr(x_groq, 'usage', None))
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            yield delta
+
+    generated_content = "".join(parts)
+    if not clean_output(generated_content):
+        logger.warning(f"Model returned no README content for {repo_url}, not caching it")
+    elif cache_key:
+        await _cache_call(_llm_cache_set, cache_key, generated_content)
+
+async def analyze_repo(repo_url: str, context: dict = None) -> str:
+    current_date, user_login = extract_current_info(
+        now=datetime.now(timezone.utc),
+        user=context.get('user') if context else None
+    )
+
+    try:
+        parts = [delta async for delta in analyze_repo_stream(repo_url, context)]
+        generated_content = "".join(parts)
         generated_content += f"\n\n---\n*Generated by GH-Readme-Bot on {current_date} UTC*"
         return clean_output(generated_content)
 
@@ -217,13 +573,15 @@ Please check:
 ---
 *Generated by GH-Readme-Bot on {current_date} UTC*"""
 
-async def analyze_repo(repo_url: str, context: dict = None) -> str:
-    import asyncio
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, analyze_repo_sync, repo_url, context)
+def analyze_repo_sync(repo_url: str, context: dict = None) -> str:
+    return asyncio.run(analyze_repo(repo_url, context))
 
 if __name__ == "__main__":
-    import asyncio
     repo_url = "https://github.com/username/repo"
-    result = asyncio.run(analyze_repo(repo_url))
-    print(result)
\ No newline at end of file
+
+    async def main():
+        async for delta in analyze_repo_stream(repo_url):
+            print(delta, end="", flush=True)
+        print()
+
+    asyncio.run(main())
\ No newline at end of file